@@ -2,15 +2,20 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import sqlite3
+import asyncio
+import tempfile
 from typing import List, Optional
 from discord.ui import View, Button
 from discord.ui import Select
+import transfer
+from user_cache import UserCache
 
 # ---------------- CONFIG ----------------
 TOKEN = "YOUR_BOT_TOKEN"
 GUILD_ID =   # Your server ID for slash command sync
 OWNER_ID =   # Your Discord user ID for admin commands
 GUILD = discord.Object(id=GUILD_ID)
+DB_PATH = "invites.db"
 
 # ---------------- INTENTS ----------------
 intents = discord.Intents.default()
@@ -18,9 +23,10 @@ intents.members = True
 intents.guilds = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
+users = UserCache(bot)
 
 # ---------------- DATABASE ----------------
-conn = sqlite3.connect("invites.db")
+conn = sqlite3.connect(DB_PATH)
 c = conn.cursor()
 
 c.execute("""
@@ -164,8 +170,8 @@ async def register(interaction: discord.Interaction, invite_link: str):
         await interaction.followup.send("Invalid invite link for this server.", ephemeral=False)
         return
 
-    owner_user = await bot.fetch_user(OWNER_ID)
-    if not owner_user:
+    owner_dm = await users.get_dm_channel(OWNER_ID)
+    if not owner_dm:
         await interaction.followup.send("Owner not found. Cannot request approval.", ephemeral=False)
         return
 
@@ -202,13 +208,10 @@ async def register(interaction: discord.Interaction, invite_link: str):
             await update_invites_cache(guild)
 
             # Notify requester
-            requester = await bot.fetch_user(self.requester_id)
-            try:
-                await requester.send(
-                    f"✅ Your invite `{self.invite_code}` has been approved and is now tracked."
-                )
-            except:
-                pass
+            await users.send(
+                self.requester_id,
+                f"✅ Your invite `{self.invite_code}` has been approved and is now tracked."
+            )
 
             # Edit owner’s message
             await interaction.response.edit_message(
@@ -224,13 +227,10 @@ async def register(interaction: discord.Interaction, invite_link: str):
                 return
 
             # Notify requester
-            requester = await bot.fetch_user(self.requester_id)
-            try:
-                await requester.send(
-                    f"❌ Your invite `{self.invite_code}` registration was denied by the owner."
-                )
-            except:
-                pass
+            await users.send(
+                self.requester_id,
+                f"❌ Your invite `{self.invite_code}` registration was denied by the owner."
+            )
 
             # Edit owner's message
             await interaction.response.edit_message(
@@ -243,7 +243,7 @@ async def register(interaction: discord.Interaction, invite_link: str):
     # ---------------------------------------------------------------------
     view = ApprovalView(interaction.user.id, invite.code)
 
-    await owner_user.send(
+    await owner_dm.send(
         content=(
             f"<@{OWNER_ID}>\n"
             f"User **{interaction.user}** requested to register invite `{invite.code}`.\n"
@@ -415,22 +415,14 @@ class InviteApprovalView(View):
         conn.commit()
         await update_invites_cache(guild)
         # DM user
-        try:
-            await member.send(f"✅ Your non-expiring invite has been approved: {invite.url}")
-        except:
-            pass
+        await users.send(self.requester_id, f"✅ Your non-expiring invite has been approved: {invite.url}")
         await interaction.message.edit(content=f"✅ Approved non-expiring invite for <@{self.requester_id}>", view=None)
         c.execute("DELETE FROM invite_requests WHERE requester_id=?", (self.requester_id,))
         conn.commit()
 
     @discord.ui.button(label="Deny", style=discord.ButtonStyle.danger)
     async def deny(self, interaction: discord.Interaction, button: Button):
-        member = bot.get_guild(GUILD_ID).get_member(self.requester_id)
-        if member:
-            try:
-                await member.send("❌ Your request for a non-expiring invite was denied.")
-            except:
-                pass
+        await users.send(self.requester_id, "❌ Your request for a non-expiring invite was denied.")
         await interaction.message.edit(content=f"❌ Denied non-expiring invite for <@{self.requester_id}>", view=None)
         c.execute("DELETE FROM invite_requests WHERE requester_id=?", (self.requester_id,))
         conn.commit()
@@ -441,17 +433,20 @@ async def request_invite(interaction: discord.Interaction):
     if c.fetchone():
         await interaction.response.send_message("You already have a pending invite request.", ephemeral=False)
         return
+    owner_dm = await users.get_dm_channel(OWNER_ID)
+    if not owner_dm:
+        await interaction.response.send_message("Owner not found. Cannot request approval.", ephemeral=False)
+        return
     c.execute("INSERT INTO invite_requests (requester_id, status) VALUES (?, ?)", (interaction.user.id, "pending"))
     conn.commit()
     # DM owner with buttons
-    owner = bot.get_user(OWNER_ID)
     view = InviteApprovalView(interaction.user.id)
     embed = discord.Embed(
         title="Non-expiring Invite Request",
         description=f"<@{interaction.user.id}> requested a non-expiring invite.\nApprove or Deny?",
         color=discord.Color.blue()
     )
-    await owner.send(content=f"<@{OWNER_ID}>", embed=embed, view=view)  # ping owner in DM
+    await owner_dm.send(content=f"<@{OWNER_ID}>", embed=embed, view=view)  # ping owner in DM
     await interaction.response.send_message("✅ Your request has been sent to the owner for approval.", ephemeral=False)
 
 
@@ -546,5 +541,86 @@ async def invite_list(interaction: discord.Interaction):
 
     await interaction.response.send_message(embed=embed, view=view, ephemeral=False)
 
+# -------------- OWNER COMMAND: USER CACHE STATS --------------
+@bot.tree.command(name="user_cache_stats", description="Show user / DM cache hit rate.", guild=GUILD)
+@owner_only()
+async def user_cache_stats(interaction: discord.Interaction):
+    stats = users.stats()
+    embed = discord.Embed(
+        title="User Cache",
+        description=(
+            f"Hit rate: **{stats['hit_rate']:.1%}** over {stats['lookups']} lookups "
+            f"({stats['user_lookups']} users, {stats['dm_lookups']} DMs)"
+        ),
+        color=discord.Color.blurple()
+    )
+    embed.add_field(name="Gateway hits", value=str(stats["gateway_hits"]))
+    embed.add_field(name="Cache hits", value=str(stats["hits"]))
+    embed.add_field(name="Coalesced", value=str(stats["coalesced"]))
+    embed.add_field(name="REST fetches", value=str(stats["fetches"]))
+    embed.add_field(name="Failed fetches", value=str(stats["failures"]))
+    embed.add_field(name="Cached", value=f"{stats['cached_users']} users, {stats['cached_dm_channels']} DMs")
+    embed.set_footer(text="Invite Tracker Bot", icon_url=bot.user.display_avatar.url)
+    await interaction.response.send_message(embed=embed, ephemeral=False)
+
+# -------------- OWNER COMMANDS: EXPORT / IMPORT --------------
+DATA_TABLES = [
+    app_commands.Choice(name="joins", value="joins"),
+    app_commands.Choice(name="registered_invites", value="registered_invites"),
+]
+DATA_FORMATS = [app_commands.Choice(name=fmt, value=fmt) for fmt in transfer.FORMATS]
+
+@bot.tree.command(name="export_data", description="Export invite data as a compressed JSONL/CSV file.", guild=GUILD)
+@owner_only()
+@app_commands.describe(table="Table to export", format="File format")
+@app_commands.choices(table=DATA_TABLES, format=DATA_FORMATS)
+async def export_data(interaction: discord.Interaction, table: str, format: str = "jsonl"):
+    await interaction.response.defer(ephemeral=False)
+
+    # Stream straight from the cursor into a gzip temp file, off the event loop
+    with tempfile.TemporaryFile() as fp:
+        try:
+            count = await asyncio.to_thread(transfer.run_on_db, DB_PATH, transfer.export_to_gzip, table, format, fp)
+        except (transfer.TransferError, sqlite3.Error) as e:
+            await interaction.followup.send(f"Export failed: {e}", ephemeral=False)
+            return
+
+        try:
+            await interaction.followup.send(
+                f"📦 Exported {count} rows from `{table}`.",
+                file=discord.File(fp, filename=transfer.export_filename(table, format)),
+                ephemeral=False
+            )
+        except discord.HTTPException as e:
+            await interaction.followup.send(f"Could not upload export (file too large?): {e}", ephemeral=False)
+
+@bot.tree.command(name="import_data", description="Import invite data from a JSONL/CSV file (plain or gzip).", guild=GUILD)
+@owner_only()
+@app_commands.describe(table="Table to import into", file="JSONL or CSV file, optionally .gz",
+                       format="File format", dry_run="Only report what would change")
+@app_commands.choices(table=DATA_TABLES, format=DATA_FORMATS)
+async def import_data(interaction: discord.Interaction, table: str, file: discord.Attachment,
+                      format: str = "jsonl", dry_run: bool = False):
+    await interaction.response.defer(ephemeral=False)
+
+    with tempfile.TemporaryFile() as fp:
+        try:
+            await file.save(fp)
+            fp.seek(0)
+            report = await asyncio.to_thread(transfer.run_on_db, DB_PATH, transfer.import_from_file,
+                                             table, format, fp, dry_run=dry_run)
+        except (transfer.TransferError, sqlite3.Error) as e:
+            await interaction.followup.send(f"Import failed: {e}", ephemeral=False)
+            return
+        except Exception as e:
+            # Already deferred, so always answer instead of leaving "thinking..."
+            await interaction.followup.send(f"Import failed: {type(e).__name__}: {e}", ephemeral=False)
+            return
+
+    if table == "registered_invites" and not dry_run and interaction.guild:
+        await update_invites_cache(interaction.guild)
+
+    await interaction.followup.send(report.summary()[:2000], ephemeral=False)
+
 # ---------------- RUN ----------------
 bot.run(TOKEN)
@@ -0,0 +1,169 @@
+import gzip
+import io
+import sqlite3
+import unittest
+
+import transfer
+
+# Run from this folder:  python -m unittest test_transfer  (or python -m pytest)
+
+SCHEMA = """
+CREATE TABLE registered_invites (
+    inviter_id INTEGER PRIMARY KEY,
+    invite_code TEXT NOT NULL UNIQUE
+);
+CREATE TABLE joins (
+    member_id INTEGER PRIMARY KEY,
+    inviter_id INTEGER NOT NULL,
+    join_date TEXT NOT NULL
+);
+CREATE TABLE vouches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    user_name TEXT NOT NULL,
+    stars INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    proof_url TEXT,
+    vouched_by_id INTEGER NOT NULL,
+    vouched_by_name TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+"""
+
+
+def make_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def export_gz(conn: sqlite3.Connection, table: str, fmt: str) -> bytes:
+    fp = io.BytesIO()
+    transfer.export_to_gzip(conn, table, fmt, fp)
+    return fp.getvalue()
+
+
+def import_text(conn, table, text, fmt="jsonl", dry_run=False) -> transfer.ImportReport:
+    return transfer.import_table(conn, table, fmt, io.StringIO(text), dry_run=dry_run)
+
+
+def rows(conn, table):
+    return conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+
+
+class RoundTripTests(unittest.TestCase):
+    def setUp(self):
+        self.src = make_db()
+        self.src.executemany(
+            "INSERT INTO vouches (user_id, user_name, stars, message, proof_url, vouched_by_id, vouched_by_name, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (1, "a", 5, "great, \"quoted\"\nmultiline", None, 1, "a", "2024-01-01 00:00:00"),
+                (2, "b", 3, "", "https://cdn/x.png", 2, "b", "2024-01-02 00:00:00"),
+            ],
+        )
+        self.src.executemany("INSERT INTO joins VALUES (?, ?, ?)", [(i, i % 3, "2024-01-01") for i in range(1, 50)])
+        self.src.commit()
+
+    def test_round_trip_both_formats(self):
+        for fmt in transfer.FORMATS:
+            for table in ("vouches", "joins"):
+                with self.subTest(fmt=fmt, table=table):
+                    data = export_gz(self.src, table, fmt)
+                    dest = make_db()
+                    report = transfer.import_from_file(dest, table, fmt, io.BytesIO(data))
+                    self.assertEqual(report.invalid, 0, report.errors)
+                    self.assertEqual(report.inserted, len(rows(self.src, table)))
+                    self.assertEqual(rows(dest, table), rows(self.src, table))
+
+    def test_plain_input_is_accepted(self):
+        text = gzip.decompress(export_gz(self.src, "joins", "csv"))
+        dest = make_db()
+        transfer.import_from_file(dest, "joins", "csv", io.BytesIO(text))
+        self.assertEqual(rows(dest, "joins"), rows(self.src, "joins"))
+
+
+class UpsertTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = make_db()
+        self.conn.executemany("INSERT INTO registered_invites VALUES (?, ?)", [(1, "A"), (2, "B")])
+        self.conn.commit()
+
+    def test_new_and_updated_counts(self):
+        data = (
+            '{"inviter_id": 1, "invite_code": "Z"}\n'
+            '{"inviter_id": 3, "invite_code": "C"}\n'
+        )
+        for dry_run in (True, False):
+            with self.subTest(dry_run=dry_run):
+                report = import_text(self.conn, "registered_invites", data, dry_run=dry_run)
+                self.assertEqual((report.processed, report.inserted, report.updated), (2, 1, 1))
+        self.assertEqual(rows(self.conn, "registered_invites"), [(1, "Z"), (2, "B"), (3, "C")])
+
+    def test_dry_run_writes_nothing(self):
+        import_text(self.conn, "registered_invites", '{"inviter_id": 9, "invite_code": "N"}\n', dry_run=True)
+        self.assertEqual(rows(self.conn, "registered_invites"), [(1, "A"), (2, "B")])
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_invite_code_clash_is_rejected(self):
+        for dry_run in (True, False):
+            with self.subTest(dry_run=dry_run):
+                report = import_text(self.conn, "registered_invites",
+                                     '{"inviter_id": 1, "invite_code": "B"}\n', dry_run=dry_run)
+                self.assertEqual((report.processed, report.invalid), (0, 1))
+                self.assertIn("already belongs to inviter_id 2", report.errors[0])
+        self.assertEqual(rows(self.conn, "registered_invites"), [(1, "A"), (2, "B")])
+
+
+class InvalidInputTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = make_db()
+
+    def test_bad_values_are_reported_per_row(self):
+        data = (
+            '{"member_id": 99999999999999999999, "inviter_id": 1, "join_date": "x"}\n'
+            '{"member_id": 1e30, "inviter_id": 1, "join_date": "x"}\n'
+            '{"member_id": 1.9, "inviter_id": 1, "join_date": "x"}\n'
+            '{"member_id": 4, "inviter_id": 1, "join_date": {"a": 1}}\n'
+            '{"member_id": 5, "inviter_id": 1, "join_date": "\\ud800"}\n'
+            'not json\n'
+            '{"member_id": 7, "inviter_id": 1, "join_date": "ok"}\n'
+        )
+        for dry_run in (True, False):
+            with self.subTest(dry_run=dry_run):
+                report = import_text(self.conn, "joins", data, dry_run=dry_run)
+                self.assertEqual((report.processed, report.invalid), (1, 6))
+        self.assertEqual(rows(self.conn, "joins"), [(7, 1, "ok")])
+
+    def test_out_of_range_integer_in_csv(self):
+        report = import_text(self.conn, "joins", "member_id,inviter_id,join_date\n99999999999999999999,1,x\n", fmt="csv")
+        self.assertEqual((report.processed, report.invalid), (0, 1))
+        self.assertIn("out of range", report.errors[0])
+
+    def test_truncated_gzip(self):
+        data = "".join(f'{{"member_id": {i}, "inviter_id": 1, "join_date": "x"}}\n' for i in range(2000))
+        truncated = gzip.compress(data.encode())[:-500]
+        with self.assertRaises(transfer.TransferError):
+            transfer.import_from_file(self.conn, "joins", "jsonl", io.BytesIO(truncated))
+
+    def test_corrupt_gzip(self):
+        data = "".join(f'{{"member_id": {i}, "inviter_id": 1, "join_date": "x"}}\n' for i in range(2000))
+        corrupt = bytearray(gzip.compress(data.encode()))
+        for i in range(20, 60):
+            corrupt[i] ^= 0xFF
+        with self.assertRaises(transfer.TransferError):
+            transfer.import_from_file(self.conn, "joins", "jsonl", io.BytesIO(bytes(corrupt)))
+        self.assertEqual(rows(self.conn, "joins"), [])
+
+    def test_partial_import_reports_committed_rows(self):
+        data = "".join(f'{{"member_id": {i}, "inviter_id": 1, "join_date": "x"}}\n' for i in range(5000))
+        src = transfer.open_reader(io.BytesIO(data.encode() + b"\xff\n"))
+        with self.assertRaises(transfer.TransferError) as ctx:
+            transfer.import_table(self.conn, "joins", "jsonl", src, batch_size=100)
+        committed = len(rows(self.conn, "joins"))
+        self.assertGreater(committed, 0)
+        self.assertIn(f"{committed} rows from earlier batches were already imported", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
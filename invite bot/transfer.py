@@ -0,0 +1,396 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import sys
+import zlib
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+# Bulk export / import of bot data.
+# Used by the owner commands in invites.py and vouches.py, and runnable on its own:
+#   python transfer.py export invites.db joins -f csv -o joins.csv.gz
+#   python transfer.py import invites.db joins joins.csv.gz -f csv --dry-run
+
+# ---------------- TABLES ----------------
+# column name -> type ("int" / "text"), in export order.
+# "key" is the column used to decide whether a row already exists (upsert).
+# "unique" are other UNIQUE columns; a clash on them rejects the row instead.
+# "optional" columns may be left empty on import (NULL / AUTOINCREMENT).
+TABLES = {
+    "joins": {
+        "columns": {"member_id": "int", "inviter_id": "int", "join_date": "text"},
+        "key": "member_id",
+        "unique": (),
+        "optional": (),
+    },
+    "registered_invites": {
+        "columns": {"inviter_id": "int", "invite_code": "text"},
+        "key": "inviter_id",
+        "unique": ("invite_code",),
+        "optional": (),
+    },
+    "vouches": {
+        "columns": {
+            "id": "int",
+            "user_id": "int",
+            "user_name": "text",
+            "stars": "int",
+            "message": "text",
+            "proof_url": "text",
+            "vouched_by_id": "int",
+            "vouched_by_name": "text",
+            "timestamp": "text",
+        },
+        "key": "id",
+        "unique": (),
+        "optional": ("id", "proof_url"),
+    },
+}
+
+FORMATS = ("jsonl", "csv")
+FETCH_SIZE = 5000     # rows pulled from the cursor per fetchmany() on export
+BATCH_SIZE = 10000    # rows per executemany() / transaction on import
+MAX_ERRORS = 10       # invalid rows quoted back in the report
+LOOKUP_SIZE = 500     # values per "IN (...)" when checking existing rows
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class TransferError(Exception):
+    pass
+
+
+@dataclass
+class ImportReport:
+    table: str
+    dry_run: bool
+    processed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        mode = "Dry run" if self.dry_run else "Imported"
+        text = (
+            f"{mode} `{self.table}`: {self.processed} rows "
+            f"({self.inserted} new, {self.updated} updated, {self.invalid} invalid)"
+        )
+        if self.errors:
+            text += "\n" + "\n".join(self.errors)
+            if self.invalid > len(self.errors):
+                text += f"\n... and {self.invalid - len(self.errors)} more"
+        return text
+
+
+# ---------------- HELPERS ----------------
+def get_table(table: str) -> dict:
+    if table not in TABLES:
+        raise TransferError(f"Unknown table `{table}`. Choose from: {', '.join(TABLES)}")
+    return TABLES[table]
+
+
+def check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise TransferError(f"Unknown format `{fmt}`. Choose from: {', '.join(FORMATS)}")
+
+
+def check_table_exists(conn: sqlite3.Connection, table: str):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    if not row:
+        raise TransferError(f"Table `{table}` does not exist in this database. Start the bot once to create it.")
+
+
+def export_filename(table: str, fmt: str) -> str:
+    return f"{table}.{fmt}.gz"
+
+
+def open_gzip_writer(fp: IO[bytes]) -> io.TextIOWrapper:
+    # Closing the returned wrapper finishes the gzip stream but leaves fp open.
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=fp, mode="wb"), encoding="utf-8", newline="")
+
+
+def open_reader(fp: IO[bytes]) -> io.TextIOWrapper:
+    # Accepts plain or gzip-compressed input, detected from the first bytes.
+    buffered = io.BufferedReader(fp) if not hasattr(fp, "peek") else fp
+    if buffered.peek(2)[:2] == GZIP_MAGIC:
+        buffered = gzip.GzipFile(fileobj=buffered, mode="rb")
+    return io.TextIOWrapper(buffered, encoding="utf-8-sig", newline="")
+
+
+def coerce_row(spec: dict, raw: dict) -> tuple:
+    values = []
+    for name, kind in spec["columns"].items():
+        value = raw.get(name)
+        # CSV can't tell NULL from "", so "" only means NULL where NULL is allowed
+        if value == "" and name in spec["optional"]:
+            value = None
+        if value is None:
+            if name not in spec["optional"]:
+                raise ValueError(f"missing `{name}`")
+            values.append(None)
+            continue
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"`{name}` must be a single value, not {type(value).__name__}")
+        if kind == "int":
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError(f"`{name}` is not an integer: {value!r}")
+            try:
+                value = int(value)
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"`{name}` is not an integer: {value!r}")
+            if not -2**63 <= value < 2**63:
+                raise ValueError(f"`{name}` is out of range for SQLite: {value}")
+        else:
+            value = str(value)
+            try:
+                value.encode("utf-8")
+            except UnicodeEncodeError:
+                raise ValueError(f"`{name}` is not valid UTF-8 text")
+        values.append(value)
+    return tuple(values)
+
+
+def iter_records(src: IO[str], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    # Yields (line number, record, error) one row at a time.
+    if fmt == "csv":
+        reader = csv.DictReader(src)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line_no, line in enumerate(src, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON ({e.msg})"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def lookup_owners(conn: sqlite3.Connection, table: str, column: str, key: str, values: list) -> dict:
+    # Maps each value of `column` already in the table to the key of its row.
+    values = list({v for v in values if v is not None})
+    owners = {}
+    for i in range(0, len(values), LOOKUP_SIZE):
+        chunk = values[i:i + LOOKUP_SIZE]
+        rows = conn.execute(
+            f"SELECT {column}, {key} FROM {table} WHERE {column} IN ({', '.join('?' for _ in chunk)})",
+            chunk
+        )
+        owners.update(rows)
+    return owners
+
+
+# ---------------- EXPORT ----------------
+def export_table(conn: sqlite3.Connection, table: str, fmt: str, out: IO[str]) -> int:
+    spec = get_table(table)
+    check_format(fmt)
+    check_table_exists(conn, table)
+    columns = list(spec["columns"])
+
+    cur = conn.cursor()
+    cur.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {spec['key']}")
+
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+    count = 0
+    while True:
+        rows = cur.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        if fmt == "csv":
+            writer.writerows(rows)
+        else:
+            out.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+        count += len(rows)
+    cur.close()
+    return count
+
+
+def export_to_gzip(conn: sqlite3.Connection, table: str, fmt: str, fp: IO[bytes]) -> int:
+    with open_gzip_writer(fp) as out:
+        count = export_table(conn, table, fmt, out)
+    fp.seek(0)
+    return count
+
+
+# ---------------- IMPORT ----------------
+def import_table(conn: sqlite3.Connection, table: str, fmt: str, src: IO[str],
+                 dry_run: bool = False, batch_size: int = BATCH_SIZE) -> ImportReport:
+    spec = get_table(table)
+    check_format(fmt)
+    check_table_exists(conn, table)
+    columns = list(spec["columns"])
+    key = spec["key"]
+    key_index = columns.index(key)
+    # Only the key column drives the upsert; rows clashing on another UNIQUE
+    # column are rejected below rather than deleting someone else's row.
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT({key}) DO UPDATE SET "
+        + ", ".join(f"{col}=excluded.{col}" for col in columns if col != key)
+    )
+
+    report = ImportReport(table=table, dry_run=dry_run)
+
+    def invalid(line_no: int, reason: str):
+        report.invalid += 1
+        if len(report.errors) < MAX_ERRORS:
+            report.errors.append(f"line {line_no}: {reason}")
+
+    def write_batch(batch: list):
+        existing = lookup_owners(conn, table, key, key, [values[key_index] for _, values in batch])
+        owners = {
+            col: lookup_owners(conn, table, col, key, [values[columns.index(col)] for _, values in batch])
+            for col in spec["unique"]
+        }
+        rows = []
+        inserted = updated = 0
+        for line_no, values in batch:
+            row_key = values[key_index]
+            clash = None
+            for col in spec["unique"]:
+                value = values[columns.index(col)]
+                owner = owners[col].get(value, row_key)
+                if owner != row_key:
+                    clash = f"`{col}` {value!r} already belongs to {key} {owner}"
+                    break
+                owners[col][value] = row_key
+            if clash:
+                invalid(line_no, clash)
+                continue
+            rows.append(values)
+            if row_key is not None and row_key in existing:
+                updated += 1
+            else:
+                inserted += 1
+                if row_key is not None:
+                    existing[row_key] = row_key
+        if not dry_run:
+            conn.executemany(sql, rows)
+        report.processed += len(rows)
+        report.inserted += inserted
+        report.updated += updated
+
+    # Dry runs only run the SELECTs in write_batch, so they never take the write
+    # lock the bot's own connection needs. They check each batch against the
+    # table as it is now, not against rows from earlier batches of the file.
+    batch = []
+    line_no = committed = 0
+    try:
+        for line_no, record, error in iter_records(src, fmt):
+            if error:
+                invalid(line_no, error)
+                continue
+            try:
+                batch.append((line_no, coerce_row(spec, record)))
+            except ValueError as e:
+                invalid(line_no, str(e))
+                continue
+            if len(batch) >= batch_size:
+                write_batch(batch)
+                batch = []
+                if not dry_run:
+                    conn.commit()
+                    committed = report.processed
+        if batch:
+            write_batch(batch)
+        if not dry_run:
+            conn.commit()
+    except (UnicodeDecodeError, EOFError, OSError, zlib.error, csv.Error, sqlite3.Error) as e:
+        # Bad / truncated uploads and locked databases: say how far a real
+        # import got, since earlier batches are already committed.
+        conn.rollback()
+        if dry_run:
+            raise TransferError(f"Dry run stopped after line {line_no}: {e}. Nothing was written.")
+        raise TransferError(
+            f"Import stopped after line {line_no}: {e}. "
+            f"{committed} rows from earlier batches were already imported, the rest of the file was not."
+        )
+    except Exception:
+        conn.rollback()
+        raise
+    return report
+
+
+def import_from_file(conn: sqlite3.Connection, table: str, fmt: str, fp: IO[bytes],
+                     dry_run: bool = False) -> ImportReport:
+    src = open_reader(fp)
+    try:
+        return import_table(conn, table, fmt, src, dry_run=dry_run)
+    finally:
+        src.detach()
+
+
+def run_on_db(db_path: str, func, *args, **kwargs):
+    # Opens a private connection so the work can run off the event loop thread.
+    with closing(sqlite3.connect(db_path, timeout=30)) as tconn:
+        return func(tconn, *args, **kwargs)
+
+
+# ---------------- CLI ----------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export / import bot data as JSONL or CSV.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Export a table (gzip compressed if the output ends in .gz)")
+    exp.add_argument("db", help="Path to the database, e.g. invites.db or vouches.db")
+    exp.add_argument("table", choices=list(TABLES))
+    exp.add_argument("-f", "--format", choices=FORMATS, default="jsonl")
+    exp.add_argument("-o", "--output", help="Output file (default: <table>.<format>.gz, '-' for stdout)")
+
+    imp = sub.add_parser("import", help="Import a table (plain or gzip input)")
+    imp.add_argument("db", help="Path to the database, e.g. invites.db or vouches.db")
+    imp.add_argument("table", choices=list(TABLES))
+    imp.add_argument("input", help="Input file ('-' for stdin)")
+    imp.add_argument("-f", "--format", choices=FORMATS, default="jsonl")
+    imp.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    imp.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+
+    try:
+        with closing(sqlite3.connect(args.db, timeout=30)) as tconn:
+            if args.command == "export":
+                output = args.output or export_filename(args.table, args.format)
+                if output == "-":
+                    out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="")
+                    count = export_table(tconn, args.table, args.format, out)
+                    out.flush()
+                    out.detach()
+                elif output.endswith(".gz"):
+                    with open(output, "wb") as fp, open_gzip_writer(fp) as out:
+                        count = export_table(tconn, args.table, args.format, out)
+                else:
+                    with open(output, "w", encoding="utf-8", newline="") as out:
+                        count = export_table(tconn, args.table, args.format, out)
+                print(f"Exported {count} rows from {args.table} to {output}", file=sys.stderr)
+            else:
+                if args.input == "-":
+                    src = open_reader(sys.stdin.buffer)
+                else:
+                    src = open_reader(open(args.input, "rb"))
+                with src:
+                    report = import_table(tconn, args.table, args.format, src,
+                                          dry_run=args.dry_run, batch_size=args.batch_size)
+                print(report.summary().replace("`", ""), file=sys.stderr)
+    except (TransferError, OSError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import discord
+
+# Cached user / DM channel lookups, so approval and notification paths don't
+# spend a REST call (and a rate limit slot) on every click.
+#   1. gateway cache (bot.get_user), free
+#   2. our own TTL + LRU cache of fetched users / opened DM channels
+#   3. one REST request per ID, shared by everyone asking at the same time
+
+
+class UserCache:
+    def __init__(self, bot: discord.Client, ttl: float = 600.0, max_size: int = 1000):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_size = max_size
+        self._users = OrderedDict()     # user_id -> (expires_at, discord.User)
+        self._channels = OrderedDict()  # user_id -> (expires_at, discord.DMChannel)
+        self._pending = {}              # (kind, user_id) -> asyncio.Task
+        # one count per get_user / get_dm_channel call, by what it needed:
+        # gateway_hits / hits (no REST), coalesced (waited on someone else's
+        # REST call) or fetches (made its own REST call)
+        self._stats = {
+            "user_lookups": 0, "dm_lookups": 0,
+            "gateway_hits": 0, "hits": 0, "coalesced": 0, "fetches": 0, "failures": 0,
+        }
+
+    # ---------------- CACHE ----------------
+    def _get_cached(self, store: OrderedDict, user_id: int):
+        entry = store.get(user_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del store[user_id]
+            return None
+        store.move_to_end(user_id)
+        return value
+
+    def _put(self, store: OrderedDict, user_id: int, value):
+        store[user_id] = (time.monotonic() + self.ttl, value)
+        store.move_to_end(user_id)
+        while len(store) > self.max_size:
+            store.popitem(last=False)
+
+    async def _coalesce(self, key: tuple, factory):
+        # Returns (result, "fetch" | "coalesced")
+        task = self._pending.get(key)
+        if task is not None:
+            source = "coalesced"
+        else:
+            source = "fetch"
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # shield: one caller being cancelled must not cancel the shared request
+        return await asyncio.shield(task), source
+
+    def _record(self, kind: str, sources: tuple):
+        # A lookup counts once, by the most expensive step it took.
+        self._stats[kind] += 1
+        for source, counter in (("fetch", "fetches"), ("coalesced", "coalesced"),
+                                ("cache", "hits"), ("gateway", "gateway_hits")):
+            if source in sources:
+                self._stats[counter] += 1
+                return
+
+    def invalidate(self, user_id: int):
+        self._users.pop(user_id, None)
+        self._channels.pop(user_id, None)
+
+    # ---------------- LOOKUPS ----------------
+    async def _resolve_user(self, user_id: int):
+        # Returns (user or None, source), without touching the stats.
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user, "gateway"
+
+        user = self._get_cached(self._users, user_id)
+        if user is not None:
+            return user, "cache"
+
+        async def fetch():
+            try:
+                fetched = await self.bot.fetch_user(user_id)
+            except discord.HTTPException:
+                self._stats["failures"] += 1
+                return None
+            self._put(self._users, user_id, fetched)
+            return fetched
+
+        return await self._coalesce(("user", user_id), fetch)
+
+    async def get_user(self, user_id: int) -> Optional[discord.User]:
+        user, source = await self._resolve_user(user_id)
+        self._record("user_lookups", (source,))
+        return user
+
+    async def get_dm_channel(self, user_id: int) -> Optional[discord.DMChannel]:
+        channel = self._get_cached(self._channels, user_id)
+        if channel is not None:
+            self._record("dm_lookups", ("cache",))
+            return channel
+
+        user, user_source = await self._resolve_user(user_id)
+        if user is None:
+            self._record("dm_lookups", (user_source,))
+            return None
+        if user.dm_channel is not None:
+            self._put(self._channels, user_id, user.dm_channel)
+            self._record("dm_lookups", (user_source,))
+            return user.dm_channel
+
+        async def open_dm():
+            try:
+                opened = await user.create_dm()
+            except discord.HTTPException:
+                self._stats["failures"] += 1
+                return None
+            self._put(self._channels, user_id, opened)
+            return opened
+
+        channel, dm_source = await self._coalesce(("dm", user_id), open_dm)
+        self._record("dm_lookups", (user_source, dm_source))
+        return channel
+
+    async def send(self, user_id: int, *args, **kwargs) -> Optional[discord.Message]:
+        # DM a user, returns None if they can't be reached (left, DMs closed, ...)
+        channel = await self.get_dm_channel(user_id)
+        if channel is None:
+            return None
+        try:
+            return await channel.send(*args, **kwargs)
+        except discord.NotFound:
+            self.invalidate(user_id)
+            return None
+        except discord.HTTPException:
+            return None
+
+    # ---------------- STATS ----------------
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        served = stats["gateway_hits"] + stats["hits"] + stats["coalesced"]
+        total = stats["user_lookups"] + stats["dm_lookups"]
+        stats["lookups"] = total
+        stats["hit_rate"] = served / total if total else 0.0
+        stats["cached_users"] = len(self._users)
+        stats["cached_dm_channels"] = len(self._channels)
+        return stats
@@ -2,11 +2,15 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import sqlite3
+import asyncio
+import tempfile
 from datetime import datetime
+import transfer
 
 # Your bot's token and constants
 TOKEN = "your_bot_token"
 OWNER_ID =   # Replace with your Discord user ID
+DB_PATH = "vouches.db"
 FOOTER_ICON_URL = "https://imgs.search.brave.com/L3X4ZKU-r8-qmyO99rjg0qUrcO58dcEBPanjpdEPNF0/rs:fit:860:0:0:0/g:ce/aHR0cHM6Ly9naWZk/Yi5jb20vaW1hZ2Vz/L2hpZ2gvYW5pbWUt/cGZwLWhvdXRhcm91/LW9yZWtpLWNvZmZl/ZS1obnN4NXpqZDMz/Y202ZzJ0LmdpZg.gif"  # Replace with your footer icon URL
 
 # Setup intents
@@ -16,7 +20,7 @@ intents.message_content = False  # We don't need content for now
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 # Connect to DB and create table if not exists
-conn = sqlite3.connect("vouches.db")
+conn = sqlite3.connect(DB_PATH)
 c = conn.cursor()
 c.execute("""
 CREATE TABLE IF NOT EXISTS vouches (
@@ -129,4 +133,59 @@ async def restore_vouches(interaction: discord.Interaction):
     # For simplicity, send only first 5 vouches in one message
     await interaction.response.send_message(f"**Vouches:**\n\n{pages[0]}")
 
+# /export_vouches command for owner only
+@bot.tree.command(name="export_vouches", description="Owner-only: Export all vouches as a compressed JSONL/CSV file")
+@app_commands.describe(format="File format")
+@app_commands.choices(format=[app_commands.Choice(name=fmt, value=fmt) for fmt in transfer.FORMATS])
+async def export_vouches(interaction: discord.Interaction, format: str = "jsonl"):
+    if interaction.user.id != OWNER_ID:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    # Stream straight from the cursor into a gzip temp file, off the event loop
+    with tempfile.TemporaryFile() as fp:
+        try:
+            count = await asyncio.to_thread(transfer.run_on_db, DB_PATH, transfer.export_to_gzip, "vouches", format, fp)
+        except (transfer.TransferError, sqlite3.Error) as e:
+            await interaction.followup.send(f"Export failed: {e}", ephemeral=True)
+            return
+
+        try:
+            await interaction.followup.send(
+                f"Exported {count} vouches.",
+                file=discord.File(fp, filename=transfer.export_filename("vouches", format)),
+                ephemeral=True
+            )
+        except discord.HTTPException as e:
+            await interaction.followup.send(f"Could not upload export (file too large?): {e}", ephemeral=True)
+
+# /import_vouches command for owner only
+@bot.tree.command(name="import_vouches", description="Owner-only: Import vouches from a JSONL/CSV file (plain or gzip)")
+@app_commands.describe(file="JSONL or CSV file, optionally .gz", format="File format", dry_run="Only report what would change")
+@app_commands.choices(format=[app_commands.Choice(name=fmt, value=fmt) for fmt in transfer.FORMATS])
+async def import_vouches(interaction: discord.Interaction, file: discord.Attachment, format: str = "jsonl", dry_run: bool = False):
+    if interaction.user.id != OWNER_ID:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    with tempfile.TemporaryFile() as fp:
+        try:
+            await file.save(fp)
+            fp.seek(0)
+            report = await asyncio.to_thread(transfer.run_on_db, DB_PATH, transfer.import_from_file,
+                                             "vouches", format, fp, dry_run=dry_run)
+        except (transfer.TransferError, sqlite3.Error) as e:
+            await interaction.followup.send(f"Import failed: {e}", ephemeral=True)
+            return
+        except Exception as e:
+            # Already deferred, so always answer instead of leaving "thinking..."
+            await interaction.followup.send(f"Import failed: {type(e).__name__}: {e}", ephemeral=True)
+            return
+
+    await interaction.followup.send(report.summary()[:2000], ephemeral=True)
+
 bot.run(TOKEN)